@@ -4,6 +4,18 @@ import streamlit as st
 from transcriber import YouTubeTranscriber
 from summarizer import TextSummarizer
 from chatbot import ChatGPT
+from storage import StorageManager
+from warmup import start_preload
+
+@st.cache_resource
+def start_server_preload(model_size):
+    """Start the background preload once per server process."""
+    return start_preload(model_size)
+
+@st.cache_resource
+def get_storage():
+    """Storage manager for the downloads directory, shared by all sessions."""
+    return StorageManager()
 
 def get_audio_player_html(audio_path):
     """Generate HTML for a custom audio player with progress bar"""
@@ -25,6 +37,10 @@ def get_audio_player_html(audio_path):
         return None
 
 
+# Optionally warm up heavy dependencies in the background at server start
+if os.environ.get("PRELOAD", "").lower() in ("1", "true", "yes"):
+    start_server_preload(os.environ.get("PRELOAD_WHISPER_MODEL") or None)
+
 # Streamlit application title
 st.title("YouTube Video GPT")
 
@@ -141,10 +157,11 @@ with tab1:
                     
                     transcriber = YouTubeTranscriber(
                         use_openai_api=True,
-                        openai_api_key=st.session_state.transcript_api_key
+                        openai_api_key=st.session_state.transcript_api_key,
+                        storage=get_storage()
                     )
                 else:
-                    transcriber = YouTubeTranscriber(model_size=model_size)
+                    transcriber = YouTubeTranscriber(model_size=model_size, storage=get_storage())
 
                 st.info("Processing the video, please wait...")
 
@@ -161,7 +178,8 @@ with tab1:
                 # Save results to session state
                 st.session_state.transcription = transcription
                 st.session_state.detected_language = detected_language
-                st.session_state.audio_file = output_txt.rsplit(".", 1)[0] + ".mp3"
+                # Only show audio this session kept; downloads/<id>.mp3 may belong to another session
+                st.session_state.audio_file = transcriber.audio_file
                 st.session_state.output_txt = output_txt
 
                 st.success(f"Transcription completed! Detected language: {detected_language}")
@@ -183,6 +201,8 @@ with tab1:
         
         if st.session_state.audio_file and os.path.exists(st.session_state.audio_file):
             st.subheader("Audio Player")
+            # Serving the audio counts as a use for the storage LRU
+            get_storage().touch(st.session_state.audio_file)
             audio_html = get_audio_player_html(st.session_state.audio_file)
             if audio_html:
                 st.markdown(audio_html, unsafe_allow_html=True)
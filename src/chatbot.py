@@ -1,4 +1,4 @@
-from openai import OpenAI, AzureOpenAI
+from warmup import lazy_import, get_http_client
 
 class ChatGPT:
     def __init__(self, api_key, model="gpt-3.5-turbo", azure=False, endpoint=None, deployment_id=None, api_version="2023-07-01-preview"):
@@ -14,17 +14,19 @@ class ChatGPT:
         - deployment_id: Required for Azure OpenAI, the deployment ID for the model.
         - api_version: Required for Azure OpenAI, the API version to use.
         """
+        openai = lazy_import("openai")
         if azure:
             if not endpoint or not deployment_id:
                 raise ValueError("For Azure OpenAI, 'endpoint' and 'deployment_id' must be provided.")
-            self.client = AzureOpenAI(
+            self.client = openai.AzureOpenAI(
                 api_key=api_key,
                 azure_endpoint=endpoint,
                 azure_deployment=deployment_id,
-                api_version=api_version
+                api_version=api_version,
+                http_client=get_http_client()
             )
         else:
-            self.client = OpenAI(api_key=api_key)
+            self.client = openai.OpenAI(api_key=api_key, http_client=get_http_client())
 
         self.model = model
 
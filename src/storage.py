@@ -0,0 +1,287 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Prefix for in-progress files and directories; anything left with it is a crash leftover.
+# Names continue with "<pid>@<hostname>@" so cleanup can tell whether the owner is still running.
+TEMP_PREFIX = ".ytgpt-tmp-"
+AUDIO_EXTENSIONS = (".mp3",)
+
+DEFAULT_UMASK = 0o022
+
+# Files currently being used by sessions in this process, with a reference count
+_in_use = Counter()
+_in_use_lock = threading.Lock()
+
+
+def temp_prefix():
+    """Prefix for temp entries created by this process."""
+    return f"{TEMP_PREFIX}{os.getpid()}@{socket.gethostname()}@"
+
+
+def temp_owner(name):
+    """Return (pid, hostname) encoded in a temp entry name, or None if it has no owner tag."""
+    parts = name[len(TEMP_PREFIX):].split("@")
+    if len(parts) < 3:
+        return None
+    try:
+        return int(parts[0]), parts[1]
+    except ValueError:
+        return None
+
+
+def pid_alive(pid):
+    """Whether a process with this PID exists on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def newest_mtime(path):
+    """Latest mtime of path and, for directories, everything inside it."""
+    newest = os.stat(path, follow_symlinks=False).st_mtime
+    if os.path.isdir(path) and not os.path.islink(path):
+        for dirpath, dirnames, filenames in os.walk(path):
+            for name in dirnames + filenames:
+                try:
+                    newest = max(newest, os.stat(os.path.join(dirpath, name), follow_symlinks=False).st_mtime)
+                except OSError:
+                    pass
+    return newest
+
+
+def current_umask():
+    """
+    Read the process umask without changing it (os.umask would briefly set it
+    for every thread). Falls back to 0o022 where /proc is not available.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    return DEFAULT_UMASK
+
+
+def file_mode():
+    """Mode open() would give a new file; mkstemp creates temp files as 0600."""
+    return 0o666 & ~current_umask()
+
+
+class StorageManager:
+    def __init__(self, root="downloads", quota_bytes=None, scratch_root=None, stale_after=3600, grace_period=600):
+        """
+        Manage the artifacts written to the downloads directory.
+        Files are named by video ID, written through a temp file plus rename,
+        and audio is garbage collected (least recently used first) once the
+        directory grows beyond the quota. Transcripts are never collected.
+
+        Parameters:
+        - root: Directory holding audio and transcript files (default is "downloads").
+        - quota_bytes: Disk quota for root; defaults to DOWNLOADS_QUOTA_MB (2048 MB). 0 disables GC.
+        - scratch_root: tmpfs directory for intermediate segments; defaults to DOWNLOADS_SCRATCH_DIR or /dev/shm.
+        - stale_after: Age in seconds after which leftover temp files whose owner cannot be
+          checked (another host, or no owner tag) are removed.
+        - grace_period: Audio used within this many seconds is never collected, which protects
+          files that sessions in other processes are still working on.
+        """
+        if quota_bytes is None:
+            quota_bytes = int(float(os.environ.get("DOWNLOADS_QUOTA_MB", 2048)) * 1024 * 1024)
+        if scratch_root is None:
+            scratch_root = os.environ.get("DOWNLOADS_SCRATCH_DIR", "/dev/shm")
+
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.scratch_root = scratch_root
+        self.stale_after = stale_after
+        self.grace_period = grace_period
+
+        os.makedirs(self.root, exist_ok=True)
+        self.cleanup_stale_files()
+
+    def audio_path(self, video_id):
+        """Path of the audio file for a video."""
+        return os.path.join(self.root, f"{video_id}.mp3")
+
+    def transcript_path(self, video_id):
+        """Path of the transcript file for a video."""
+        return os.path.join(self.root, f"{video_id}.txt")
+
+    def make_temp_dir(self, parent=None):
+        """Create a private temp directory (inside root by default)."""
+        return tempfile.mkdtemp(prefix=temp_prefix(), dir=parent or self.root)
+
+    def scratch_dir(self, required_bytes):
+        """
+        Create a temp directory for intermediate files.
+        Uses the tmpfs scratch root when it has room for required_bytes,
+        otherwise falls back to the downloads directory.
+        """
+        if self.scratch_root and os.path.isdir(self.scratch_root) and os.access(self.scratch_root, os.W_OK):
+            try:
+                if shutil.disk_usage(self.scratch_root).free > 2 * required_bytes:
+                    return self.make_temp_dir(self.scratch_root)
+            except OSError:
+                pass
+        return self.make_temp_dir()
+
+    @contextmanager
+    def atomic_write(self, path, mode="w", encoding=None):
+        """Open a temp file next to path and rename it over path once writing succeeds."""
+        fd, temp_path = tempfile.mkstemp(prefix=temp_prefix(), dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, mode, encoding=encoding) as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+                os.fchmod(f.fileno(), file_mode())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def commit(self, temp_path, path):
+        """Atomically move a finished file into place."""
+        try:
+            os.replace(temp_path, path)
+        except OSError:
+            # Different filesystem: copy next to the target first, then rename
+            with self.atomic_write(path, "wb") as dst, open(temp_path, "rb") as src:
+                shutil.copyfileobj(src, dst)
+            os.remove(temp_path)
+        self.touch(path)
+        return path
+
+    def touch(self, path):
+        """
+        Mark a file as recently used.
+        GC orders files by mtime, which this sets explicitly; atime is not
+        reliable on relatime/noatime mounts.
+        """
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def in_use(self, path):
+        """Protect path from garbage collection while the block runs."""
+        key = os.path.abspath(path)
+        with _in_use_lock:
+            _in_use[key] += 1
+        self.touch(path)
+        try:
+            yield path
+        finally:
+            with _in_use_lock:
+                _in_use[key] -= 1
+                if _in_use[key] <= 0:
+                    del _in_use[key]
+            self.touch(path)
+
+    def is_in_use(self, path):
+        """Whether a session in this process is currently using path."""
+        with _in_use_lock:
+            return _in_use[os.path.abspath(path)] > 0
+
+    def usage(self):
+        """Total size in bytes of everything under root."""
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        return total
+
+    def collect_garbage(self, keep=()):
+        """
+        Delete least recently used audio files until usage fits the quota.
+        Transcripts, the paths in keep, files in use by this process and files
+        used within the grace period are never deleted.
+        Returns the list of deleted files.
+        """
+        if self.quota_bytes <= 0:
+            return []
+
+        usage = self.usage()
+        if usage <= self.quota_bytes:
+            return []
+
+        keep = {os.path.abspath(path) for path in keep}
+        recent = time.time() - self.grace_period
+        candidates = []
+        for entry in os.scandir(self.root):
+            if (entry.is_file() and entry.name.endswith(AUDIO_EXTENSIONS)
+                    and not entry.name.startswith(TEMP_PREFIX)
+                    and os.path.abspath(entry.path) not in keep):
+                stat = entry.stat()
+                if stat.st_mtime > recent or self.is_in_use(entry.path):
+                    continue
+                candidates.append((stat.st_mtime, stat.st_size, entry.path))
+
+        deleted = []
+        for _, size, path in sorted(candidates):
+            if usage <= self.quota_bytes:
+                break
+            # Re-check right before deleting; a session may have picked the file up since the scan
+            if self.is_in_use(path):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            usage -= size
+            deleted.append(path)
+            print(f"Removed cached audio file: {path}")
+        return deleted
+
+    def is_stale(self, path):
+        """
+        Whether a temp entry was abandoned by its owner.
+        Entries owned by a process on this host are stale once that process is
+        gone. Otherwise (another host, or no owner tag) an entry is stale when
+        nothing inside it has been modified for stale_after seconds.
+        """
+        owner = temp_owner(os.path.basename(path))
+        if owner and owner[1] == socket.gethostname() and os.name != "nt":
+            pid, _ = owner
+            return pid != os.getpid() and not pid_alive(pid)
+        return newest_mtime(path) < time.time() - self.stale_after
+
+    def cleanup_stale_files(self):
+        """Remove temp files and directories left behind by crashed runs."""
+        for directory in (self.root, self.scratch_root):
+            if not directory or not os.path.isdir(directory):
+                continue
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.name.startswith(TEMP_PREFIX):
+                    continue
+                try:
+                    if not self.is_stale(entry.path):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
@@ -1,78 +1,113 @@
 import os
 import re
-import yt_dlp
-from openai import OpenAI
-from pydub import AudioSegment
 import math
+import shutil
+from storage import StorageManager
+from warmup import lazy_import, get_http_client, get_whisper_model, whisper_model_lock
 
 class YouTubeTranscriber:
-    def __init__(self, model_size="base", use_openai_api=False, openai_api_key=None):
+    def __init__(self, model_size="base", use_openai_api=False, openai_api_key=None, storage=None):
         """
         Initialize the transcriber with local Whisper model or OpenAI Whisper API
         :param model_size: Size of the local Whisper model (e.g., "base", "large")
         :param use_openai_api: Whether to use OpenAI Whisper API
         :param openai_api_key: OpenAI API key (required if use_openai_api=True)
+        :param storage: StorageManager for downloaded files (defaults to one rooted at "downloads")
         """
         self.use_openai_api = use_openai_api
+        self.storage = storage or StorageManager()
+        # Audio file kept by the last process_video call (None if it was not kept)
+        self.audio_file = None
         
         # Only set API-specific constraints if using OpenAI API
         if use_openai_api:
             if not openai_api_key:
                 raise ValueError("OpenAI API key is required when using OpenAI Whisper API.")
-            self.client = OpenAI(api_key=openai_api_key)
+            openai = lazy_import("openai")
+            self.client = openai.OpenAI(api_key=openai_api_key, http_client=get_http_client())
             self.MAX_FILE_SIZE = 25 * 1024 * 1024  # 25MB in bytes
             self.SEGMENT_LENGTH = 15 * 60 * 1000    # 10 minutes in milliseconds
             print("Using OpenAI Whisper API")
         else:
-            import whisper
-            print(f"Loading local Whisper model ({model_size})...")
-            self.model = whisper.load_model(model_size)
-            print("Local model loaded successfully")
+            self.model = get_whisper_model(model_size)
+            # The model is shared across sessions; inference calls must be serialized
+            self.model_lock = whisper_model_lock(model_size)
 
     def sanitize_filename(self, filename):
         """Replace illegal characters in the filename with underscores."""
         return re.sub(r'[<>:"/\\|?*]', '_', filename)
 
-    def download_audio(self, url, output_path="downloads"):
-        """Download the audio part of a YouTube video using yt-dlp."""
+    def download_audio_to(self, url, target_dir):
+        """
+        Download the audio part of a YouTube video into target_dir using yt-dlp.
+        Returns the path of the downloaded MP3 and the sanitized video ID.
+        """
+        yt_dlp = lazy_import("yt_dlp")
+
+        ydl_opts = {
+            'format': 'bestaudio/best',
+            'outtmpl': os.path.join(target_dir, '%(id)s.%(ext)s'),
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+                'preferredquality': '192',
+            }],
+            'quiet': False,
+            'no_warnings': True,
+        }
+
+        print(f"Downloading video: {url}")
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=True)
+
+        downloaded = [f for f in os.listdir(target_dir) if f.endswith(".mp3")]
+        if not downloaded:
+            raise FileNotFoundError(f"Downloaded file not found for: {url}")
+
+        video_id = self.sanitize_filename(info.get('id', 'unknown_id'))
+        return os.path.join(target_dir, downloaded[0]), video_id
+
+    def download_audio(self, url, output_path=None):
+        """
+        Download the audio part of a YouTube video using yt-dlp.
+        The file is downloaded into a temp directory and renamed to <video_id>.mp3 when complete.
+        :param output_path: Directory to store the audio in (defaults to the transcriber's storage root)
+        """
+        storage = self.storage
+        if output_path is not None and os.path.abspath(output_path) != os.path.abspath(storage.root):
+            storage = StorageManager(
+                output_path,
+                quota_bytes=storage.quota_bytes,
+                scratch_root=storage.scratch_root,
+                stale_after=storage.stale_after,
+                grace_period=storage.grace_period
+            )
+
+        temp_dir = None
         try:
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-
-            info_extractor = yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True})
-            info = info_extractor.extract_info(url, download=False)
-            raw_title = info.get('title', 'unknown_title')
-            safe_title = self.sanitize_filename(raw_title)
-
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'outtmpl': os.path.join(output_path, f'{safe_title}.%(ext)s'),
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '192',
-                }],
-                'quiet': False,
-                'no_warnings': True,
-            }
-
-            print(f"Downloading video: {url}")
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-
-            downloaded_file = os.path.join(output_path, f"{safe_title}.mp3")
-            if not os.path.exists(downloaded_file):
-                raise FileNotFoundError(f"Downloaded file not found: {downloaded_file}")
+            temp_dir = storage.make_temp_dir()
+            temp_file, video_id = self.download_audio_to(url, temp_dir)
+            downloaded_file = storage.commit(temp_file, storage.audio_path(video_id))
 
             print(f"Audio downloaded to: {downloaded_file}")
             return downloaded_file
 
         except Exception as e:
             raise Exception(f"Error while downloading audio: {str(e)}")
+        finally:
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
 
-    def split_audio_file(self, audio_file):
-        """Split audio file into segments smaller than 25MB."""
+    def split_audio_file(self, audio_file, output_dir=None):
+        """
+        Split audio file into segments smaller than 25MB, written to output_dir.
+        Without output_dir, a new scratch directory is created (on tmpfs when it has room);
+        the caller removes it once the segments are no longer needed.
+        """
         try:
+            if output_dir is None:
+                output_dir = self.storage.scratch_dir(os.path.getsize(audio_file))
+            AudioSegment = lazy_import("pydub").AudioSegment
             print(f"Loading audio file: {audio_file}")
             audio = AudioSegment.from_mp3(audio_file)
             duration = len(audio)
@@ -87,7 +122,7 @@ class YouTubeTranscriber:
                 end = min((i + 1) * self.SEGMENT_LENGTH, duration)
                 
                 segment = audio[start:end]
-                segment_path = f"{audio_file[:-4]}_segment_{i}.mp3"
+                segment_path = os.path.join(output_dir, f"segment_{i}.mp3")
                 segment.export(segment_path, format="mp3")
                 
                 # Verify segment size
@@ -105,25 +140,26 @@ class YouTubeTranscriber:
     def transcribe_audio_local(self, audio_file, language=None):
         """Transcribe audio file using the local Whisper model."""
         try:
-            import whisper
+            whisper = lazy_import("whisper")
             print(f"Starting transcription for audio: {audio_file}")
 
-            if language is None:
-                print("Detecting audio language...")
-                audio = whisper.load_audio(audio_file)
-                audio = whisper.pad_or_trim(audio)
-                mel = whisper.log_mel_spectrogram(audio).to(self.model.device)
-                _, probs = self.model.detect_language(mel)
-                detected_language = max(probs, key=probs.get)
-                print(f"Detected language: {detected_language}")
-                language = detected_language
-
-            print(f"Using language: {language}")
-            result = self.model.transcribe(
-                audio_file,
-                language=language,
-                task="transcribe"
-            )
+            with self.model_lock:
+                if language is None:
+                    print("Detecting audio language...")
+                    audio = whisper.load_audio(audio_file)
+                    audio = whisper.pad_or_trim(audio)
+                    mel = whisper.log_mel_spectrogram(audio).to(self.model.device)
+                    _, probs = self.model.detect_language(mel)
+                    detected_language = max(probs, key=probs.get)
+                    print(f"Detected language: {detected_language}")
+                    language = detected_language
+
+                print(f"Using language: {language}")
+                result = self.model.transcribe(
+                    audio_file,
+                    language=language,
+                    task="transcribe"
+                )
 
             return result["text"], language
             
@@ -149,12 +185,16 @@ class YouTubeTranscriber:
 
     def transcribe_audio_openai(self, audio_file, language=None):
         """Transcribe audio file using OpenAI Whisper API."""
+        segment_dir = None
         try:
             iso_language = self.get_iso639_1_code(language) if language else None
             # Check if file size exceeds limit
-            if os.path.getsize(audio_file) > self.MAX_FILE_SIZE:
+            file_size = os.path.getsize(audio_file)
+            if file_size > self.MAX_FILE_SIZE:
                 print("File size exceeds 25MB limit, splitting into segments...")
-                segments = self.split_audio_file(audio_file)
+                # Segments are short-lived, keep them on tmpfs when there is room
+                segment_dir = self.storage.scratch_dir(file_size)
+                segments = self.split_audio_file(audio_file, segment_dir)
                 transcriptions = []
                 
                 for i, segment in enumerate(segments):
@@ -184,26 +224,26 @@ class YouTubeTranscriber:
             return transcription, language
         
         except Exception as e:
-            # Clean up any remaining segment files in case of error
-            if 'segments' in locals():
-                for segment in segments:
-                    if os.path.exists(segment):
-                        try:
-                            os.remove(segment)
-                        except:
-                            pass
             raise Exception(f"Error while transcribing audio with OpenAI API: {str(e)}")
+        finally:
+            # Clean up any remaining segment files
+            if segment_dir:
+                shutil.rmtree(segment_dir, ignore_errors=True)
 
-    def transcribe_audio(self, audio_file, language=None):
-        """Transcribe audio using the selected method (local or OpenAI API)."""
+    def transcribe_audio(self, audio_file, language=None, output_txt=None):
+        """
+        Transcribe audio using the selected method (local or OpenAI API).
+        The transcription is saved to output_txt (defaults to the audio path with a .txt extension).
+        """
         if self.use_openai_api:
             transcription, detected_language = self.transcribe_audio_openai(audio_file, language)
         else:
             transcription, detected_language = self.transcribe_audio_local(audio_file, language)
             
         # Save transcription to file
-        output_txt = audio_file.rsplit(".", 1)[0] + ".txt"
-        with open(output_txt, "w", encoding="utf-8") as f:
+        if output_txt is None:
+            output_txt = audio_file.rsplit(".", 1)[0] + ".txt"
+        with self.storage.atomic_write(output_txt, "w", encoding="utf-8") as f:
             f.write(transcription)
         
         print(f"Transcription saved to: {output_txt}")
@@ -213,25 +253,41 @@ class YouTubeTranscriber:
         """
         Full process: download video audio and transcribe.
         If language is not specified, it will be detected automatically.
+        The kept audio file, if any, is available as self.audio_file afterwards.
         """
-        audio_file = None
+        temp_dir = None
+        self.audio_file = None
         try:
             print(f"Processing video: {url}")
 
-            audio_file = self.download_audio(url)
+            if keep_audio:
+                audio_file = self.download_audio(url)
+                output_txt = None
+            else:
+                # Audio that is not kept stays private to this call, so removing it
+                # never affects another session transcribing the same video
+                temp_dir = self.storage.make_temp_dir()
+                audio_file, video_id = self.download_audio_to(url, temp_dir)
+                output_txt = self.storage.transcript_path(video_id)
+
+            with self.storage.in_use(audio_file):
+                transcription, output_txt, detected_language = self.transcribe_audio(
+                    audio_file, language, output_txt
+                )
 
-            transcription, output_txt, detected_language = self.transcribe_audio(audio_file, language)
+            if keep_audio:
+                self.audio_file = audio_file
 
-            if not keep_audio and audio_file and os.path.exists(audio_file):
-                os.remove(audio_file)
-                print("Audio file deleted")
-            
             return transcription, output_txt, detected_language
-            
+
         except Exception as e:
-            if audio_file and os.path.exists(audio_file) and not keep_audio:
-                try:
-                    os.remove(audio_file)
-                except:
-                    pass
-            raise Exception(f"Error while processing video: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error while processing video: {str(e)}")
+        finally:
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                print("Audio file deleted")
+            # Keep the downloads directory within its quota, also after failed runs
+            try:
+                self.storage.collect_garbage()
+            except OSError as e:
+                print(f"Garbage collection failed: {str(e)}")
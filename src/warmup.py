@@ -0,0 +1,134 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Import durations (seconds) of modules loaded through lazy_import
+IMPORT_TIMES = {}
+
+# Number of local Whisper models kept loaded per process; older ones are evicted
+MAX_WHISPER_MODELS = int(os.environ.get("MAX_WHISPER_MODELS", 1))
+
+_whisper_models = OrderedDict()
+# Guards _whisper_models and the lock maps; never held while loading a model
+_whisper_models_lock = threading.Lock()
+_whisper_load_locks = {}
+# Whisper's decoder installs kv-cache hooks on the model's modules, so a shared
+# model must only run one detect_language/transcribe call at a time
+_whisper_use_locks = {}
+_http_client = None
+_http_client_lock = threading.Lock()
+_preload_thread = None
+
+
+def lazy_import(module_name):
+    """
+    Import a module on first use and record how long the import took.
+    Heavy dependencies (openai, yt_dlp, pydub, whisper) go through here so
+    they are only loaded for the backend that is actually selected.
+    """
+    if module_name in sys.modules:
+        return importlib.import_module(module_name)
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+    IMPORT_TIMES[module_name] = elapsed
+    if os.environ.get("PROFILE_IMPORTS"):
+        print(f"Imported {module_name} in {elapsed:.3f}s")
+    return module
+
+
+def _cached_whisper_model(model_size):
+    """Return a cached model and mark it most recently used, or None."""
+    with _whisper_models_lock:
+        model = _whisper_models.get(model_size)
+        if model is not None:
+            _whisper_models.move_to_end(model_size)
+        return model
+
+
+def get_whisper_model(model_size="base"):
+    """
+    Load a local Whisper model and reuse it afterwards.
+    At most MAX_WHISPER_MODELS models stay cached (least recently used are
+    evicted), and each model size has its own load lock so loading one size
+    does not block requests for another.
+    """
+    model = _cached_whisper_model(model_size)
+    if model is not None:
+        return model
+
+    with _whisper_models_lock:
+        load_lock = _whisper_load_locks.setdefault(model_size, threading.Lock())
+
+    with load_lock:
+        # Another thread may have loaded it while we waited
+        model = _cached_whisper_model(model_size)
+        if model is not None:
+            return model
+
+        whisper = lazy_import("whisper")
+        print(f"Loading local Whisper model ({model_size})...")
+        model = whisper.load_model(model_size)
+        print("Local model loaded successfully")
+
+        with _whisper_models_lock:
+            _whisper_models[model_size] = model
+            while len(_whisper_models) > max(MAX_WHISPER_MODELS, 1):
+                evicted, _ = _whisper_models.popitem(last=False)
+                print(f"Evicted local Whisper model ({evicted})")
+        return model
+
+
+def whisper_model_lock(model_size="base"):
+    """
+    Lock to hold for the whole of any inference call on the shared model of
+    model_size. Different model sizes can run concurrently.
+    """
+    with _whisper_models_lock:
+        return _whisper_use_locks.setdefault(model_size, threading.Lock())
+
+
+def get_http_client():
+    """
+    Shared HTTP client for all OpenAI/Azure OpenAI clients in this process.
+    Reusing it keeps one connection pool and TLS context instead of building
+    new ones for every session.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            openai = lazy_import("openai")
+            _http_client = openai.DefaultHttpxClient()
+        return _http_client
+
+
+def preload(model_size=None):
+    """
+    Warm up heavy dependencies: import the OpenAI, yt-dlp and audio libraries,
+    build the shared HTTP client and, if model_size is given, load the local
+    Whisper model.
+    """
+    try:
+        for module_name in ("openai", "yt_dlp", "pydub"):
+            lazy_import(module_name)
+        get_http_client()
+        if model_size:
+            get_whisper_model(model_size)
+        print("Preload finished")
+    except Exception as e:
+        print(f"Preload failed: {str(e)}")
+
+
+def start_preload(model_size=None):
+    """Run preload() in a background daemon thread, at most once per process."""
+    global _preload_thread
+    if _preload_thread is None:
+        _preload_thread = threading.Thread(
+            target=preload, args=(model_size,), name="preload", daemon=True
+        )
+        _preload_thread.start()
+    return _preload_thread
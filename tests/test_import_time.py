@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Importing the app modules must not pull in any of these
+HEAVY_MODULES = ["openai", "yt_dlp", "pydub", "whisper", "torch"]
+
+# Budget in seconds for importing transcriber, summarizer and chatbot
+IMPORT_BUDGET = 0.5
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import transcriber, summarizer, chatbot
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+class ImportTimeTest(unittest.TestCase):
+    def run_import(self):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = SRC_DIR + os.pathsep + env.get("PYTHONPATH", "")
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT],
+            env=env, capture_output=True, text=True, check=True
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_heavy_modules_are_not_imported(self):
+        self.assertEqual(self.run_import()["loaded"], [])
+
+    def test_import_time_budget(self):
+        elapsed = self.run_import()["elapsed"]
+        self.assertLess(elapsed, IMPORT_BUDGET, f"Import took {elapsed:.3f}s, budget is {IMPORT_BUDGET}s")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+import os
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+import storage
+from storage import StorageManager, TEMP_PREFIX
+
+DiskUsage = namedtuple("DiskUsage", "total used free")
+
+OLD = time.time() - 24 * 3600
+
+
+class StorageTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.join(self.tmp.name, "downloads")
+        self.scratch = os.path.join(self.tmp.name, "shm")
+        os.makedirs(self.scratch)
+
+    def make_storage(self, **kwargs):
+        kwargs.setdefault("scratch_root", self.scratch)
+        kwargs.setdefault("quota_bytes", 0)
+        return StorageManager(self.root, **kwargs)
+
+    def write(self, path, size=100, mtime=OLD):
+        with open(path, "wb") as f:
+            f.write(b"0" * size)
+        os.utime(path, (mtime, mtime))
+        return path
+
+
+class CollectGarbageTest(StorageTestCase):
+    def test_evicts_least_recently_used_audio_first(self):
+        s = self.make_storage(quota_bytes=250)
+        oldest = self.write(s.audio_path("a"), mtime=OLD)
+        newer = self.write(s.audio_path("b"), mtime=OLD + 10)
+        newest = self.write(s.audio_path("c"), mtime=OLD + 20)
+
+        self.assertEqual(s.collect_garbage(), [oldest])
+        self.assertFalse(os.path.exists(oldest))
+        self.assertTrue(os.path.exists(newer))
+        self.assertTrue(os.path.exists(newest))
+
+    def test_touch_marks_audio_as_recently_used(self):
+        s = self.make_storage(quota_bytes=150, grace_period=0)
+        first = self.write(s.audio_path("a"), mtime=OLD)
+        second = self.write(s.audio_path("b"), mtime=OLD + 10)
+        s.touch(first)
+
+        self.assertEqual(s.collect_garbage(), [second])
+
+    def test_protected_files_survive(self):
+        s = self.make_storage(quota_bytes=1)
+        transcript = self.write(s.transcript_path("a"))
+        kept = self.write(s.audio_path("kept"))
+        in_use = self.write(s.audio_path("in_use"))
+        recent = self.write(s.audio_path("recent"), mtime=time.time())
+        unprotected = self.write(s.audio_path("old"))
+
+        with s.in_use(in_use):
+            os.utime(in_use, (OLD, OLD))
+            deleted = s.collect_garbage(keep=[kept])
+
+        self.assertEqual(deleted, [unprotected])
+        for path in (transcript, kept, in_use, recent):
+            self.assertTrue(os.path.exists(path), path)
+
+    def test_in_use_is_released(self):
+        s = self.make_storage()
+        path = self.write(s.audio_path("a"))
+        with s.in_use(path):
+            with s.in_use(path):
+                pass
+            self.assertTrue(s.is_in_use(path))
+        self.assertFalse(s.is_in_use(path))
+
+    def test_zero_quota_disables_gc(self):
+        s = self.make_storage(quota_bytes=0)
+        path = self.write(s.audio_path("a"), size=10000)
+        self.assertEqual(s.collect_garbage(), [])
+        self.assertTrue(os.path.exists(path))
+
+    def test_under_quota_deletes_nothing(self):
+        s = self.make_storage(quota_bytes=10000)
+        path = self.write(s.audio_path("a"))
+        self.assertEqual(s.collect_garbage(), [])
+        self.assertTrue(os.path.exists(path))
+
+
+class AtomicWriteTest(StorageTestCase):
+    def test_exception_leaves_no_temp_file(self):
+        s = self.make_storage()
+        path = s.transcript_path("a")
+        with self.assertRaises(RuntimeError):
+            with s.atomic_write(path, "w", encoding="utf-8") as f:
+                f.write("partial")
+                raise RuntimeError("boom")
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_exception_keeps_previous_content(self):
+        s = self.make_storage()
+        path = s.transcript_path("a")
+        with s.atomic_write(path, "w", encoding="utf-8") as f:
+            f.write("old")
+        with self.assertRaises(RuntimeError):
+            with s.atomic_write(path, "w", encoding="utf-8") as f:
+                f.write("new")
+                raise RuntimeError("boom")
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "old")
+
+    def test_uses_umask_permissions(self):
+        s = self.make_storage()
+        path = s.transcript_path("a")
+        old_umask = os.umask(0o027)
+        try:
+            with s.atomic_write(path, "w", encoding="utf-8") as f:
+                f.write("text")
+        finally:
+            os.umask(old_umask)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o640)
+
+    def test_commit_falls_back_to_copy_across_filesystems(self):
+        s = self.make_storage()
+        source = self.write(os.path.join(self.scratch, "a.mp3"))
+        target = s.audio_path("a")
+        real_replace = os.replace
+        calls = []
+
+        def replace(src, dst):
+            calls.append(src)
+            if len(calls) == 1:
+                raise OSError("Invalid cross-device link")
+            return real_replace(src, dst)
+
+        with mock.patch.object(storage.os, "replace", side_effect=replace):
+            s.commit(source, target)
+
+        self.assertFalse(os.path.exists(source))
+        self.assertEqual(os.path.getsize(target), 100)
+        self.assertEqual(os.listdir(self.root), ["a.mp3"])
+
+
+class ScratchDirTest(StorageTestCase):
+    def test_uses_scratch_root_with_room(self):
+        s = self.make_storage()
+        self.assertEqual(os.path.dirname(s.scratch_dir(10)), self.scratch)
+
+    def test_falls_back_when_scratch_root_missing(self):
+        s = self.make_storage(scratch_root=os.path.join(self.tmp.name, "missing"))
+        self.assertEqual(os.path.dirname(s.scratch_dir(10)), self.root)
+
+    def test_falls_back_when_scratch_root_too_small(self):
+        s = self.make_storage()
+        with mock.patch.object(storage.shutil, "disk_usage", return_value=DiskUsage(100, 90, 10)):
+            self.assertEqual(os.path.dirname(s.scratch_dir(10)), self.root)
+
+
+class CleanupStaleFilesTest(StorageTestCase):
+    def make_entry(self, directory, name, mtime=OLD):
+        path = os.path.join(directory, name)
+        os.makedirs(path)
+        self.write(os.path.join(path, "audio.part"), mtime=mtime)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_removes_only_stale_temp_entries(self):
+        os.makedirs(self.root)
+        host = socket.gethostname()
+        finished = subprocess.Popen([sys.executable, "-c", "pass"])
+        finished.wait()
+
+        regular = self.write(os.path.join(self.root, "a.mp3"))
+        old_untagged = self.make_entry(self.root, TEMP_PREFIX + "old")
+        recent_untagged = self.make_entry(self.root, TEMP_PREFIX + "recent", mtime=time.time())
+        dead_owner = self.make_entry(self.scratch, f"{TEMP_PREFIX}{finished.pid}@{host}@x", mtime=time.time())
+        live_owner = self.make_entry(self.root, f"{TEMP_PREFIX}{os.getpid()}@{host}@x")
+        other_host_active = self.make_entry(self.root, f"{TEMP_PREFIX}1@elsewhere@x")
+        self.write(os.path.join(other_host_active, "audio.part"), mtime=time.time())
+        other_host_old = self.make_entry(self.root, f"{TEMP_PREFIX}1@elsewhere@y")
+
+        self.make_storage()
+
+        for path in (old_untagged, dead_owner, other_host_old):
+            self.assertFalse(os.path.exists(path), path)
+        for path in (regular, recent_untagged, live_owner, other_host_active):
+            self.assertTrue(os.path.exists(path), path)
+
+    def test_temp_entries_carry_owner(self):
+        s = self.make_storage()
+        name = os.path.basename(s.make_temp_dir())
+        self.assertEqual(storage.temp_owner(name), (os.getpid(), socket.gethostname()))
+        self.assertIsNone(storage.temp_owner(TEMP_PREFIX + "untagged"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+import warmup
+from storage import StorageManager, TEMP_PREFIX
+from transcriber import YouTubeTranscriber
+
+
+class StubYoutubeDL:
+    """Writes a fake MP3 named after the video ID taken from the URL."""
+
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def extract_info(self, url, download=True):
+        video_id = url.rsplit("=", 1)[-1]
+        path = self.opts["outtmpl"].replace("%(id)s", video_id).replace("%(ext)s", "mp3")
+        with open(path, "wb") as f:
+            f.write(b"0" * 100)
+        return {"id": video_id}
+
+
+class StubModel:
+    device = "cpu"
+
+    def transcribe(self, audio_file, language=None, task=None):
+        if "fail" in audio_file:
+            raise RuntimeError("boom")
+        return {"text": "hello"}
+
+
+class ProcessVideoTest(unittest.TestCase):
+    def setUp(self):
+        yt_dlp = types.ModuleType("yt_dlp")
+        yt_dlp.YoutubeDL = StubYoutubeDL
+        whisper = types.ModuleType("whisper")
+        whisper.load_model = lambda model_size: StubModel()
+        patcher = mock.patch.dict(sys.modules, {"yt_dlp": yt_dlp, "whisper": whisper})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for cache in (warmup._whisper_models, warmup._whisper_load_locks, warmup._whisper_use_locks):
+            cache.clear()
+            self.addCleanup(cache.clear)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.join(self.tmp.name, "downloads")
+        self.storage = StorageManager(self.root, quota_bytes=0, scratch_root="")
+        self.transcriber = YouTubeTranscriber(storage=self.storage)
+
+    def test_keep_audio_stores_audio_by_video_id(self):
+        transcription, output_txt, _ = self.transcriber.process_video("https://y?v=abc", "en", keep_audio=True)
+
+        self.assertEqual(transcription, "hello")
+        self.assertEqual(output_txt, self.storage.transcript_path("abc"))
+        self.assertEqual(self.transcriber.audio_file, self.storage.audio_path("abc"))
+        self.assertEqual(sorted(os.listdir(self.root)), ["abc.mp3", "abc.txt"])
+
+    def test_audio_not_kept_never_touches_shared_file(self):
+        shared = self.storage.audio_path("abc")
+        with open(shared, "wb") as f:
+            f.write(b"other session")
+
+        _, output_txt, _ = self.transcriber.process_video("https://y?v=abc", "en", keep_audio=False)
+
+        self.assertIsNone(self.transcriber.audio_file)
+        self.assertEqual(output_txt, self.storage.transcript_path("abc"))
+        with open(shared, "rb") as f:
+            self.assertEqual(f.read(), b"other session")
+        self.assertFalse([name for name in os.listdir(self.root) if name.startswith(TEMP_PREFIX)])
+
+    def test_garbage_collection_runs_after_failure(self):
+        with mock.patch.object(self.storage, "collect_garbage") as collect_garbage:
+            with self.assertRaises(Exception):
+                self.transcriber.process_video("https://y?v=fail", "en", keep_audio=True)
+        collect_garbage.assert_called_once_with()
+        self.assertIsNone(self.transcriber.audio_file)
+
+    def test_download_audio_output_path(self):
+        other = os.path.join(self.tmp.name, "other")
+        path = self.transcriber.download_audio("https://y?v=abc", output_path=other)
+        self.assertEqual(path, os.path.join(other, "abc.mp3"))
+        self.assertEqual(os.listdir(other), ["abc.mp3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+import warmup
+from chatbot import ChatGPT
+from storage import StorageManager
+from summarizer import TextSummarizer
+from transcriber import YouTubeTranscriber
+
+
+class StubModel:
+    """Records how many transcribe calls overlap, like Whisper's shared kv-cache hooks would."""
+
+    device = "cpu"
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.guard = threading.Lock()
+
+    def transcribe(self, audio_file, language=None, task=None):
+        with self.guard:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.guard:
+            self.active -= 1
+        return {"text": audio_file}
+
+
+class WhisperModelTest(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+
+        def load_model(model_size):
+            self.loads.append(model_size)
+            time.sleep(0.05)
+            return StubModel()
+
+        stub = types.ModuleType("whisper")
+        stub.load_model = load_model
+        patcher = mock.patch.dict(sys.modules, {"whisper": stub})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        for cache in (warmup._whisper_models, warmup._whisper_load_locks, warmup._whisper_use_locks):
+            cache.clear()
+            self.addCleanup(cache.clear)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.storage = StorageManager(os.path.join(self.tmp.name, "downloads"), scratch_root="")
+
+    def run_concurrently(self, target, count=2):
+        results = [None] * count
+
+        def run(i):
+            results[i] = target(i)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_loads_share_one_model(self):
+        models = self.run_concurrently(lambda i: warmup.get_whisper_model("base"))
+        self.assertIs(models[0], models[1])
+        self.assertEqual(self.loads, ["base"])
+
+    def test_concurrent_transcriptions_are_serialized(self):
+        def transcribe(i):
+            transcriber = YouTubeTranscriber(model_size="base", storage=self.storage)
+            return transcriber.transcribe_audio_local(f"audio_{i}.mp3", language="en")
+
+        results = self.run_concurrently(transcribe)
+
+        model = warmup.get_whisper_model("base")
+        self.assertEqual(model.max_active, 1)
+        self.assertEqual(sorted(results), [("audio_0.mp3", "en"), ("audio_1.mp3", "en")])
+
+    def test_cache_evicts_least_recently_used_model(self):
+        with mock.patch.object(warmup, "MAX_WHISPER_MODELS", 1):
+            warmup.get_whisper_model("tiny")
+            warmup.get_whisper_model("large")
+        self.assertEqual(list(warmup._whisper_models), ["large"])
+
+
+class HttpClientTest(unittest.TestCase):
+    def setUp(self):
+        stub = types.ModuleType("openai")
+        stub.DefaultHttpxClient = object
+
+        class StubClient:
+            def __init__(self, **kwargs):
+                self.kwargs = kwargs
+
+        stub.OpenAI = stub.AzureOpenAI = StubClient
+        patcher = mock.patch.dict(sys.modules, {"openai": stub})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.object(warmup, "_http_client", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_clients_share_one_http_client(self):
+        http_client = warmup.get_http_client()
+        summarizer = TextSummarizer(api_key="key")
+        chatbot = ChatGPT(api_key="key", azure=True, endpoint="https://example", deployment_id="gpt")
+        self.assertIs(summarizer.client.kwargs["http_client"], http_client)
+        self.assertIs(chatbot.client.kwargs["http_client"], http_client)
+
+
+if __name__ == "__main__":
+    unittest.main()